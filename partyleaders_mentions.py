@@ -4,12 +4,21 @@ Daily keyword-filtered news digest → PDF
 (Party Leaders Mentions) — improved matching & coverage
 """
 
-import os, re, html, unicodedata
-from typing import Optional, List, Dict
+import os, re, html, json, string, base64, hashlib, binascii, unicodedata
+from typing import Optional, List, Dict, NamedTuple
 from datetime import datetime, timedelta, date
-from dateutil import tz
+from dateutil import tz, parser as dateparser
 import calendar, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from operator import attrgetter
 import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    import fastfeedparser  # lxml-based, far faster than feedparser on large feeds
+except ImportError:
+    fastfeedparser = None
 from rapidfuzz import fuzz
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote_plus
 from reportlab.lib.pagesizes import A4
@@ -99,23 +108,42 @@ TIMEZONE = "Europe/London"
 
 # Filename formatting
 PDF_FILENAME_FORMAT = "{weekday}, {date_dmy}.pdf"  # e.g. "Monday, 22-09-2025.pdf"
+PUBLISHED_FORMAT = "%a, %d %b %Y %H:%M %Z"         # e.g. "Mon, 22 Sep 2025 09:00 BST"
 
 # Matching/collection parameters
 FUZZY_THRESHOLD = 80          # was 88 — loosened to catch variants
+FUZZY_MIN_ALIAS_LEN = 8       # bare surnames are covered by the exact match; fuzz full names only
 MAX_ITEMS_PER_FEED = 300      # was 120 — busy days can exceed this
+STALE_RUN_TO_STOP = 3         # consecutive pre-today entries before a newest-first feed is abandoned
 MAX_RESULTS_PER_DAY = 500
 SUMMARY_CHARS = 320
+MATCH_CHARS = 600             # leading summary chars scanned for mentions
 EMPTY_SECTION_LINES = 1
+
+# Network
+FEED_TIMEOUT = 15             # seconds per feed download
+FEED_WORKERS = 16             # feeds downloaded in parallel
+USER_AGENT = "Mozilla/5.0 (compatible; mentions-digest/1.0)"
+
+# Conditional-GET cache: per-feed ETag/Last-Modified plus that day's matches,
+# so an unchanged feed (HTTP 304) is neither re-downloaded nor re-parsed
+FEED_CACHE_PATH = os.path.join(".cache", "partyleaders_feeds.json")
 # ---------------------------------------
 
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
+# Precompiled once; these run for every title/summary/link
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_TRAIL_SLASH_RE = re.compile(r"/+$")
+_OPEN_TAG_TAIL_RE = re.compile(r"<[^>]*$")  # a tag cut in half by clipping
+
 def strip_html(s: str) -> str:
     if not s: return ""
-    s = re.sub(r"<[^>]+>", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _TAG_RE.sub(" ", s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 def norm(s): return (s or "").strip()
@@ -125,69 +153,121 @@ def normalize_text(s: str) -> str:
     s = html.unescape(s or "")
     s = unicodedata.normalize("NFKC", s)
     s = s.replace("’", "'")  # normalize curly apostrophes
-    s = re.sub(r"\s+", " ", s).strip().lower()
+    s = _WS_RE.sub(" ", s).strip().lower()
     return s
 
 # ---------- Matching ----------
+# Aliases are static, so normalize them once here rather than per entry
+_ALIASES_NORM: Dict[str, List[str]] = {
+    canonical: [normalize_text(a) for a in aliases] for canonical, aliases in LEADER_ALIASES.items()
+}
+
+# Every alias of every leader fused into one alternation (longest first), so each
+# entry is scanned once and each match maps straight back to its leader
+_ALIAS_TO_LEADER: Dict[str, str] = {
+    a: canonical for canonical, aliases in _ALIASES_NORM.items() for a in aliases
+}
+_ALIAS_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(a) for a in sorted(_ALIAS_TO_LEADER, key=len, reverse=True)) + r")\b"
+)
+
 def find_all_hits(title_raw: str, summary_raw: str) -> List[str]:
-    text = normalize_text(f"{title_raw}\n{summary_raw}")
+    # Mentions sit in the opening sentences; don't scan multi-KB descriptions to the end
+    text = normalize_text(f"{title_raw}\n{summary_raw[:MATCH_CHARS]}")
+    title_norm = normalize_text(title_raw)
+    # strict word-boundary match first
+    exact = {_ALIAS_TO_LEADER[m.group(0)] for m in _ALIAS_RE.finditer(text)}
     hits = []
-    for canonical, aliases in LEADER_ALIASES.items():
+    for canonical, aliases in _ALIASES_NORM.items():
+        if canonical in exact:
+            hits.append(canonical); continue
+        # fuzzy backup: full-name aliases only, against the (short) title;
+        # score_cutoff lets rapidfuzz bail out early on hopeless alignments
         for a in aliases:
-            a_norm = normalize_text(a)
-            # strict word-boundary match first
-            if re.search(rf"\b{re.escape(a_norm)}\b", text):
-                hits.append(canonical); break
-            # fuzzy backup
-            if fuzz.partial_ratio(a_norm, text) >= FUZZY_THRESHOLD:
+            if len(a) <= FUZZY_MIN_ALIAS_LEN:
+                continue
+            if fuzz.partial_ratio(a, title_norm, score_cutoff=FUZZY_THRESHOLD):
                 hits.append(canonical); break
     return hits
 
+# ----------- ITEMS -----------
+class Item(NamedTuple):
+    """One matched article; a plain tuple is far lighter than a dict per entry."""
+    source: str
+    title: str      # raw feed markup; strip_html runs at render time, after dedupe
+    summary: str    # raw, pre-clipped to SUMMARY_CHARS*3
+    link: str
+    published: str  # display string, PUBLISHED_FORMAT in local time
+    hits: List[str]
+    pub_ts: float   # UTC epoch seconds, for sorting
+
 # ----------- DEDUPE HELPERS -----------
-_TRACKING_PREFIXES = ("utm_", "gclid", "gclsrc", "fbclid", "at_", "ns_", "ito", "cmp", "icid", "ref")
+_FP_KEEP = set((string.ascii_lowercase + string.digits).encode())
+_FP_TABLE = bytes(c if c in _FP_KEEP else 0x20 for c in range(256))
+_KEEP_KEYS = frozenset({"id","p","story","article"})  # no tracking key (utm_*, fbclid, ...) is kept
+
+_GN_TARGET_RE = re.compile(rb"https?://[\x21-\x7e]+")
+
+def google_news_target(url: str) -> str:
+    """Publisher URL behind a news.google.com/rss/articles/<id> link, when recoverable.
 
+    Older ids are base64 protobufs that embed the target URL verbatim; newer opaque
+    ids can't be decoded offline, so those links are returned unchanged.
+    """
+    try:
+        s = urlsplit(url)
+        if s.netloc.lower() != "news.google.com" or "/articles/" not in s.path:
+            return url
+        token = s.path.rstrip("/").rsplit("/", 1)[-1]
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, binascii.Error):
+        return url
+    m = _GN_TARGET_RE.search(raw)
+    return m.group(0).decode("ascii") if m else url
+
+@lru_cache(maxsize=8192)  # Google News mirrors repeat the same URLs across feeds
 def canonical_url(url: str) -> str:
     if not url: return ""
+    url = google_news_target(url)  # mirrors collapse onto the publisher's own URL
     try:
         s = urlsplit(url.strip())
         scheme = "https" if s.scheme in ("http", "https", "") else s.scheme
         netloc = s.netloc.lower()
         if netloc.startswith("www."): netloc = netloc[4:]
-        path = re.sub(r"/+$", "", s.path) or "/"
-        keep_keys = {"id","p","story","article"}
-        params = [(k,v) for k,v in parse_qsl(s.query, keep_blank_values=True)]
-        params = [(k,v) for (k,v) in params if not any(k.lower().startswith(p) for p in _TRACKING_PREFIXES)]
-        params = [(k,v) for (k,v) in params if k in keep_keys]
+        path = _TRAIL_SLASH_RE.sub("", s.path) or "/"
+        # the whitelist already drops every tracking parameter
+        params = [(k,v) for k,v in parse_qsl(s.query, keep_blank_values=True) if k in _KEEP_KEYS]
         query = urlencode(params)
         return urlunsplit((scheme, netloc, path, query, ""))
     except:
         return url
 
+@lru_cache(maxsize=8192)
 def url_domain(url: str) -> str:
     try: return (urlsplit(url).netloc or "").lower().lstrip("www.")
     except: return ""
 
+@lru_cache(maxsize=8192)
 def title_fingerprint(title: str) -> str:
     t = (title or "").lower().replace("&amp;","&")
-    t = re.sub(r"[^a-z0-9]+"," ",t)
-    return re.sub(r"\s+"," ",t).strip()
+    # Non-ASCII encodes to "?" and, like all other non [a-z0-9] bytes, translates to a space
+    return " ".join(t.encode("ascii","replace").translate(_FP_TABLE).decode("ascii").split())
 
 def dedupe(items):
-    seen_urls=set(); seen_titles_by_domain={}; seen_titles_global=set(); result=[]
+    """Keep the first item per canonical URL and per (domain, title fingerprint).
+    Only 64-bit hashes of those keys go into one seen-set, not the strings."""
+    seen=set(); result=[]
     for it in items:
-        url=it.get("link",""); can=canonical_url(url)
+        url=it.link; can=canonical_url(url)
         if can:
-            if can in seen_urls: continue
-            seen_urls.add(can)
+            h=hash(("url",can))
+            if h in seen: continue
+            seen.add(h)
         domain=url_domain(can or url)
-        tfp=title_fingerprint(it.get("title",""))
-        if domain=="news.google.com" or not domain:
-            if tfp in seen_titles_global: continue
-            seen_titles_global.add(tfp)
-        else:
-            bucket=seen_titles_by_domain.setdefault(domain,set())
-            if tfp in bucket: continue
-            bucket.add(tfp)
+        if domain=="news.google.com": domain=""  # aggregator links: titles dedupe globally
+        h=hash((domain,title_fingerprint(it.title)))
+        if h in seen: continue
+        seen.add(h)
         result.append(it)
     return result
 
@@ -202,47 +282,135 @@ def build_feeds() -> Dict[str, str]:
     return feeds
 
 # ----------- FETCH -----------
-def fetch_feed(name: str, url: str, london_tz, target_date: date):
-    parsed = feedparser.parse(url); out=[]
+# One pooled session: keep-alive across feeds on the same host, gzip handled by requests
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = USER_AGENT
+# Default pools keep 10 connections per host; the Google News feeds alone outnumber that
+_ADAPTER = HTTPAdapter(pool_connections=FEED_WORKERS, pool_maxsize=FEED_WORKERS)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+def download_feed(url: str, etag: Optional[str] = None, modified: Optional[str] = None):
+    """Return (body, etag, last_modified); body is None when the server answers 304."""
+    headers = {}
+    if etag: headers["If-None-Match"] = etag
+    if modified: headers["If-Modified-Since"] = modified
+    resp = _SESSION.get(url, timeout=FEED_TIMEOUT, headers=headers)
+    if resp.status_code == 304:
+        return None, etag, modified
+    resp.raise_for_status()
+    return resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+# Cached matches are only valid for the aliases, thresholds and formats that produced them
+_MATCH_CONFIG = hashlib.sha1(json.dumps(
+    [LEADER_ALIASES, MATCH_CHARS, SUMMARY_CHARS, FUZZY_THRESHOLD, FUZZY_MIN_ALIAS_LEN, PUBLISHED_FORMAT]
+).encode("utf-8")).hexdigest()
+
+def load_feed_cache(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Items are stored as bare rows; entries written with another Item layout or another
+    # matching config are refetched
+    fields = list(Item._fields)
+    return {url: entry for url, entry in cache.items()
+            if entry.get("fields") == fields and entry.get("config") == _MATCH_CONFIG}
+
+def save_feed_cache(path: str, cache: Dict[str, dict]):
+    ensure_dir(os.path.dirname(path))
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def parse_feed(raw: bytes):
+    """Parse with fastfeedparser when installed; feedparser handles anything it rejects."""
+    if fastfeedparser is not None:
+        try:
+            return fastfeedparser.parse(raw)
+        except Exception:
+            pass
+    return feedparser.parse(raw)
+
+def entry_datetime_utc(e) -> Optional[datetime]:
+    """feedparser gives struct_time fields; fastfeedparser gives ISO strings."""
+    struct = e.get("published_parsed") or e.get("updated_parsed")
+    if struct:
+        return datetime.utcfromtimestamp(calendar.timegm(struct)).replace(tzinfo=tz.UTC)
+    stamp = e.get("published") or e.get("updated")
+    if not stamp:
+        return None
+    try:
+        dt = dateparser.parse(stamp)
+    except (ValueError, OverflowError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=tz.UTC)
+    return dt.astimezone(tz.UTC)
+
+def fetch_feed(name: str, url: str, london_tz, target_date: date, cache: Dict[str, dict]):
+    cached = cache.get(url) or {}
+    raw, etag, modified = download_feed(url, cached.get("etag"), cached.get("modified"))
+    if raw is None:
+        # Unchanged since the last run: reuse its matches if that run was today
+        if cached.get("date") != target_date.isoformat():
+            return []
+        return [Item(*row) for row in cached.get("items", [])]
+
+    parsed = parse_feed(raw); out=[]
+    # Publisher feeds are newest-first; Google News search results are ranked by relevance
+    newest_first = url_domain(url) != "news.google.com"
+    stale_run = 0
     for e in parsed.entries[:MAX_ITEMS_PER_FEED]:
-        struct = e.get("published_parsed") or e.get("updated_parsed")
-        if not struct: 
+        dt_utc = entry_datetime_utc(e)
+        if not dt_utc: 
             continue
-        dt_utc = datetime.utcfromtimestamp(calendar.timegm(struct)).replace(tzinfo=tz.UTC)
         dt_lon = dt_utc.astimezone(london_tz)
+        if dt_lon.date() < target_date:
+            # A short run of older entries (tolerates the odd pinned story) means the rest is older too
+            stale_run += 1
+            if newest_first and stale_run >= STALE_RUN_TO_STOP:
+                break
+            continue
+        stale_run = 0
         if dt_lon.date() != target_date:
             continue
 
         # Keep original strings for display
         title_raw = norm(e.get("title"))
         summary_raw = norm(e.get("summary","")) or norm(e.get("description",""))
-        link = norm(e.get("link"))
-        pub = norm(e.get("published", e.get("updated","")))
+        link = google_news_target(norm(e.get("link")))
+        pub = dt_lon.strftime(PUBLISHED_FORMAT)  # same text whichever parser ran
 
         # Matching is done on normalized text
         hits = find_all_hits(title_raw, summary_raw)
         if not hits: 
             continue
 
-        out.append({
-            "source": name,
-            "title": strip_html(title_raw),
-            "summary": strip_html(summary_raw)[:SUMMARY_CHARS],
-            "link": link,
-            "published": pub,
-            "hits": hits
-        })
+        # Only SUMMARY_CHARS survive, so clip (with headroom for markup) now;
+        # HTML is stripped in make_pdf so duplicates dropped by dedupe never pay for it
+        summary_clip = _OPEN_TAG_TAIL_RE.sub("", summary_raw[:SUMMARY_CHARS*3])
+        out.append(Item(name, title_raw, summary_clip, link, pub, hits, dt_utc.timestamp()))
+    cache[url] = {"etag": etag, "modified": modified, "date": target_date.isoformat(),
+                  "fields": list(Item._fields), "config": _MATCH_CONFIG, "items": out}
     return out
 
 # ----------- PDF RENDERING -----------
+# One alternation per leader (longest alias first), compiled once
+_HIGHLIGHT_RE: Dict[str, re.Pattern] = {
+    leader: re.compile("|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True)), re.IGNORECASE)
+    for leader, aliases in LEADER_ALIASES.items()
+}
+
 def highlight_title_for_leader(title: str, leader_canonical: Optional[str]) -> str:
     """Bold any alias occurrences for the matched leader in the title."""
     safe = html.escape(title)
-    if leader_canonical and leader_canonical in LEADER_ALIASES:
-        aliases = sorted(LEADER_ALIASES[leader_canonical], key=len, reverse=True)
-        for alias in aliases:
-            pattern = re.compile(re.escape(alias), re.IGNORECASE)
-            safe = pattern.sub(r"<b>\g<0></b>", safe)
+    pattern = _HIGHLIGHT_RE.get(leader_canonical)
+    if pattern:
+        # single pass, so "farage" inside an already-bolded "nigel farage" isn't wrapped twice
+        safe = pattern.sub(r"<b>\g<0></b>", safe)
     return safe
 
 def make_pdf(items, path, run_dt_local, num_sources: int):
@@ -263,11 +431,12 @@ def make_pdf(items, path, run_dt_local, num_sources: int):
 
     items_by_leader={kw:[] for kw in CANONICAL}
     for it in items:
-        for kw in it.get("hits",[]):
-            items_by_leader.setdefault(kw, []).append(it)
+        for kw in it.hits:
+            if kw in items_by_leader:
+                items_by_leader[kw].append(it)
 
     for leader in CANONICAL:
-        section_items=items_by_leader.get(leader,[])
+        section_items=items_by_leader[leader]
         flow.append(Paragraph(leader.title(),h3))
         if not section_items:
             for _ in range(EMPTY_SECTION_LINES): 
@@ -275,25 +444,26 @@ def make_pdf(items, path, run_dt_local, num_sources: int):
             flow.append(Spacer(1,6)); 
             continue
 
-        section_items_sorted=sorted(section_items,key=lambda x:x.get("published",""),reverse=True)
-        for it in section_items_sorted:
-            flow.append(Paragraph(highlight_title_for_leader(it.get("title") or "(no title)", leader), body))
+        # Numeric key: also fixes ordering, as RFC 822 date strings don't sort chronologically
+        section_items.sort(key=attrgetter("pub_ts"),reverse=True)
+        for it in section_items:
+            flow.append(Paragraph(highlight_title_for_leader(strip_html(it.title) or "(no title)", leader), body))
             meta_bits=[]
-            if it.get("source"): meta_bits.append(it["source"])
-            if it.get("published"): meta_bits.append(it["published"])
+            if it.source: meta_bits.append(it.source)
+            if it.published: meta_bits.append(it.published)
             if meta_bits: flow.append(Paragraph(" · ".join(html.escape(b) for b in meta_bits),meta))
-            if it.get("summary"): flow.append(Paragraph(html.escape(it["summary"]),body))
-            if it.get("link"):
-                link_html=f'<a href="{html.escape(it["link"])}">{html.escape(it["link"])}</a>'
+            summary=strip_html(it.summary)[:SUMMARY_CHARS]
+            if summary: flow.append(Paragraph(html.escape(summary),body))
+            if it.link:
+                link_html=f'<a href="{html.escape(it.link)}">{html.escape(it.link)}</a>'
                 flow.append(Paragraph(link_html,link_style))
         flow.append(Spacer(1,8))
 
     def on_page(canvas_,doc_):
-        from reportlab.lib.pagesizes import A4 as PAGESIZE
         canvas_.saveState()
         footer=f"{TITLE} · {weekday}, {run_dt_local.strftime('%Y-%m-%d')} · Page {doc_.page}"
         canvas_.setFont("Helvetica",8); canvas_.setFillColor(colors.grey)
-        canvas_.drawRightString(PAGESIZE[0]-2*cm,1.2*cm,footer); canvas_.restoreState()
+        canvas_.drawRightString(A4[0]-2*cm,1.2*cm,footer); canvas_.restoreState()
     doc.build(flow,onFirstPage=on_page,onLaterPages=on_page)
 
 # ----------- MAIN -----------
@@ -304,12 +474,23 @@ def main():
 
     feeds = build_feeds()  # includes base + Daily Mail via Google per leader
 
+    # Feeds are network-bound: download + parse them in parallel
+    feed_cache=load_feed_cache(FEED_CACHE_PATH)
+    results={}
+    with ThreadPoolExecutor(max_workers=FEED_WORKERS) as pool:
+        futures={pool.submit(fetch_feed,name,url,london,today_lon,feed_cache): name for name,url in feeds.items()}
+        for fut in as_completed(futures):
+            name=futures[fut]
+            try:
+                results[name]=fut.result()
+            except Exception as ex:
+                print(f"[warn] {name}: {ex}")
+    save_feed_cache(FEED_CACHE_PATH,feed_cache)
+
+    # Merge in feed order so dedupe keeps the same "first seen" item every run
     all_items=[]
-    for name,url in feeds.items():
-        try:
-            all_items.extend(fetch_feed(name,url,london,today_lon))
-        except Exception as ex:
-            print(f"[warn] {name}: {ex}")
+    for name in feeds:
+        all_items.extend(results.get(name,[]))
 
     all_items = dedupe(all_items)[:MAX_RESULTS_PER_DAY]
 
@@ -3,16 +3,21 @@
 Daily keyword-filtered news digest → PDF
 """
 
-import os, re, html
-from typing import Optional, Tuple, List, Dict
+import os, re, time, zlib, codecs, string, sqlite3, hashlib
+from typing import NamedTuple, Optional, Tuple, List, Dict
 from datetime import datetime, timedelta
 from dateutil import tz
 import calendar
 import feedparser
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+try:
+    from selectolax.lexbor import LexborHTMLParser  # C HTML parser, one pass over the page
+except ImportError:
+    LexborHTMLParser = None
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, parse_qs
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.enums import TA_LEFT
@@ -20,6 +25,9 @@ from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 from functools import lru_cache
+from operator import attrgetter
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ---------------- CONFIG ----------------
 # Not case sensitive!
@@ -42,40 +50,18 @@ BODY_TRIGGERS = {
     "ed davey", "lib dem", "liberal democrat", "liberal democrats"
 }
 
-NAME_BY_DOMAIN = {
-    "theguardian.com": "The Guardian",
-    "bbc.co.uk": "BBC", "bbc.com": "BBC",
-    "inews.co.uk": "i Paper",
-    "telegraph.co.uk": "Telegraph",
-    "independent.co.uk": "Independent",
-    "dailymail.co.uk": "Daily Mail",
-    "express.co.uk": "Daily Express",
-    "ft.com": "Financial Times",
-    "thetimes.co.uk": "The Times",
-    "spectator.co.uk": "Spectator",
-    "mirror.co.uk": "Daily Mirror",
-    "newstatesman.com": "New Statesman",
-    "itv.com": "ITV",
-    "cityam.com": "City AM",
-    "economist.com": "The Economist",
-}
-
-def url_domain(url: str) -> str:
-    from urllib.parse import urlsplit
-    try:
-        return (urlsplit(url).netloc or "").lower().lstrip("www.")
-    except Exception:
-        return ""
-
-def outlet_name_from_url(url: str) -> str:
-    dom = url_domain(url)
-    return NAME_BY_DOMAIN.get(dom, dom or "Unknown")
-
-
 # Article fetch settings
 MAX_ARTICLE_BYTES = 2_500_000
+ARTICLE_CHUNK = 65_536  # streamed read size
 ARTICLE_TIMEOUT = 12  # seconds
+FEED_TIMEOUT = 15     # seconds
+
+# On-disk article cache shared across runs (sqlite, zlib-compressed text)
+ARTICLE_CACHE_PATH = os.path.join(".cache", "reform_articles.sqlite")
+ARTICLE_CACHE_TTL = 2 * 24 * 3600  # seconds
 BODY_FETCH_BUDGET = 80  # total page fetches per run
+ARTICLE_WORKERS = 16    # article bodies fetched in parallel
+FEED_WORKERS = 16       # feeds fetched in parallel
 
 # Output and formatting
 BASE_OUT_DIR = "Reform MPs"
@@ -179,6 +165,31 @@ NAME_BY_DOMAIN: Dict[str, str] = {
 }
 
 # ---------------- HELPERS ----------------
+# Hot patterns, compiled once (these run over every entry and fetched article)
+_NON_TEXT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "picture", "source"]
+_RE_SCRIPT = re.compile(r"<(" + "|".join(_NON_TEXT_TAGS) + r").*?>.*?</\1>", re.I | re.S)
+_RE_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_RE_TAG = re.compile(r"<[^>]+>")
+_RE_WS = re.compile(r"\s+")
+_RE_TRAIL_SLASH = re.compile(r"/+$")
+_RE_CHARSET = re.compile(r"charset=([A-Za-z0-9_\-]+)")
+_RE_MAIN_END = re.compile(r"</main\s*>", re.I)  # after this: footer, related links, trackers
+_RE_REFORM_PARTY = re.compile(r"\breform\s*uk\b|\breform\b.{0,12}\bparty\b")
+_RE_MR_FARAGE = re.compile(r"\bmr\s+farage\b")
+_RE_NIGEL_FARAGE = re.compile(r"\bnigel\b.{0,40}\bfarage\b|\bfarage\b.{0,40}\bnigel\b")
+_RE_ZIA_YUSUF = re.compile(r"\bzia\b.{0,40}\byusuf\b|\byusuf\b.{0,40}\bzia\b")
+KEYWORDS_LOWER = [kw.lower() for kw in KEYWORDS]
+_KW_BY_LOWER = dict(zip(KEYWORDS_LOWER, KEYWORDS))
+
+def _alternation(words) -> re.Pattern:
+    """One whole-word pattern for several lowercase phrases, longest first."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r")\b")
+
+_TRIGGER_ALT = _alternation(BODY_TRIGGERS)
+# Body targets in priority order; Farage/Yusuf also accept the looser forms in _full_name_satisfied
+TARGET_FULL_NAMES = ("nigel farage", "richard tice", "lee anderson", "danny kruger", "sarah pochin", "david bull", "zia yusuf")
+_TARGET_ALT = _alternation(TARGET_FULL_NAMES)
+
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
@@ -186,78 +197,190 @@ def ensure_dir(path):
 def strip_html(s: str) -> str:
     if not s:
         return ""
-    s = re.sub(r"(?is)<(script|style|noscript|template|svg|iframe|picture|source).*?>.*?</\1>", " ", s)
-    s = re.sub(r"(?is)<!--.*?-->", " ", s)
-    s = re.sub(r"<[^>]+>", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_SCRIPT.sub(" ", s)
+    s = _RE_COMMENT.sub(" ", s)
+    s = _RE_TAG.sub(" ", s)
+    s = _RE_WS.sub(" ", s).strip()
     return s
 
+def article_html_to_text(s: str) -> str:
+    """Visible text of a fetched page; selectolax when installed, strip_html otherwise."""
+    if LexborHTMLParser is not None:
+        try:
+            tree = LexborHTMLParser(s)
+            tree.strip_tags(_NON_TEXT_TAGS)
+            return " ".join(tree.text(separator=" ").split())
+        except Exception:
+            pass
+    return strip_html(s)
+
 def norm(s):
     return (s or "").strip()
 
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"  # same notion of a word character as regex \b
+
 def contains_word(text: str, needle: str) -> bool:
-    return re.search(rf"\b{re.escape(needle)}\b", text, re.IGNORECASE) is not None
+    """Whole-word test for a lowercase needle in lowercased text.
+
+    str.find does the scanning in C; most calls miss and return on the first find,
+    and a hit only needs its two neighbouring characters checked.
+    """
+    n, end = len(needle), len(text)
+    i = text.find(needle)
+    while i >= 0:
+        k = i + n
+        if (i == 0 or not _is_word_char(text[i - 1])) and (k == end or not _is_word_char(text[k])):
+            return True
+        i = text.find(needle, i + 1)
+    return False
 
+# Known outlet domains, anchored at the end of the host so subdomains (www., news., …) match too
+_DOMAIN_RE = re.compile(r"(?:^|\.)(" + "|".join(re.escape(d) for d in NAME_BY_DOMAIN) + r")$")
+
+@lru_cache(maxsize=2048)
 def outlet_name_from_url(url: str) -> str:
-    dom = url_domain(url)
-    return NAME_BY_DOMAIN.get(dom, dom or "Unknown")
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        host = ""
+    m = _DOMAIN_RE.search(host)
+    if m:
+        return NAME_BY_DOMAIN[m.group(1)]
+    return (host[4:] if host.startswith("www.") else host) or "Unknown"
+
+def _article_cache() -> sqlite3.Connection:
+    # One short-lived connection per call: safe from the article worker threads
+    ensure_dir(os.path.dirname(ARTICLE_CACHE_PATH))
+    db = sqlite3.connect(ARTICLE_CACHE_PATH, timeout=30)
+    db.execute("CREATE TABLE IF NOT EXISTS articles (key TEXT PRIMARY KEY, text BLOB, fetched_at INTEGER)")
+    return db
+
+def _article_cache_failed(ex: sqlite3.Error):
+    # The cache is only an optimisation: never let it fail the run. A corrupt file would be
+    # restored by CI again and again, so drop it and let the next connection recreate it
+    print(f"[warn] article cache: {ex}")
+    if isinstance(ex, sqlite3.DatabaseError) and not isinstance(ex, sqlite3.OperationalError):
+        try:
+            os.remove(ARTICLE_CACHE_PATH)
+        except OSError:
+            pass
+
+def _article_cache_get(key: str) -> Optional[str]:
+    try:
+        with closing(_article_cache()) as db:
+            row = db.execute("SELECT text FROM articles WHERE key = ? AND fetched_at > ?",
+                             (key, int(time.time()) - ARTICLE_CACHE_TTL)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+    except sqlite3.Error as ex:
+        _article_cache_failed(ex)
+    except (zlib.error, UnicodeDecodeError):
+        pass  # damaged row: refetch, and the put below overwrites it
+    return None
+
+def _article_cache_put(key: str, text: str):
+    try:
+        with closing(_article_cache()) as db, db:
+            db.execute("INSERT OR REPLACE INTO articles (key, text, fetched_at) VALUES (?, ?, ?)",
+                       (key, zlib.compress(text.encode("utf-8")), int(time.time())))
+    except sqlite3.Error as ex:
+        _article_cache_failed(ex)
+
+def prune_article_cache():
+    try:
+        with closing(_article_cache()) as db, db:
+            db.execute("DELETE FROM articles WHERE fetched_at <= ?", (int(time.time()) - ARTICLE_CACHE_TTL,))
+    except sqlite3.Error as ex:
+        _article_cache_failed(ex)
 
 @lru_cache(maxsize=512)
 def fetch_article_text(url: str) -> str:
-    """Fetch article HTML, return plain text."""
+    """Article plain text: in-process lru_cache, then the sqlite cache, then the network."""
     if not url:
         return ""
+    key = hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+    text = _article_cache_get(key)
+    if text is None:
+        text = _download_article_text(url)
+        if text:  # failures are retried next run
+            _article_cache_put(key, text)
+    return text
+
+# One pooled session for every feed and article fetch: connections (and TLS handshakes) are
+# reused per host across the worker threads, and transient connection errors are retried
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = (  # realistic UA helps with BBC + others
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+_ADAPTER = HTTPAdapter(pool_connections=ARTICLE_WORKERS, pool_maxsize=ARTICLE_WORKERS,
+                       max_retries=Retry(total=2, backoff_factor=0.3))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+def _download_article_text(url: str) -> str:
+    """Fetch article HTML, return plain text."""
     try:
-        # Realistic UA helps with BBC + others
-        req = Request(url, headers={
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0.0.0 Safari/537.36"
-            )
-        })
-        with urlopen(req, timeout=ARTICLE_TIMEOUT) as resp:
-            raw = resp.read(MAX_ARTICLE_BYTES)
+        with _SESSION.get(url, timeout=ARTICLE_TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
             ctype = resp.headers.get("Content-Type", "")
-            m = re.search(r"charset=([A-Za-z0-9_\-]+)", ctype)
+            m = _RE_CHARSET.search(ctype)
             enc = (m.group(1) if m else "utf-8").strip()
             try:
-                html_text = raw.decode(enc, errors="ignore")
+                decoder = codecs.getincrementaldecoder(enc)(errors="ignore")
             except LookupError:
-                html_text = raw.decode("utf-8", errors="ignore")
-    except (HTTPError, URLError, TimeoutError, Exception):
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            # Stream + decode chunk by chunk and stop once the main content has closed,
+            # rather than pulling, decoding and stripping the page's whole tail
+            parts, total, tail = [], 0, ""
+            for chunk in resp.iter_content(ARTICLE_CHUNK):
+                chunk = chunk[:MAX_ARTICLE_BYTES - total]
+                total += len(chunk)
+                text = decoder.decode(chunk)
+                end = _RE_MAIN_END.search(tail + text)
+                if end:
+                    parts.append(text[:end.end() - len(tail)])
+                    break
+                parts.append(text)
+                if total >= MAX_ARTICLE_BYTES:
+                    break
+                tail = text[-16:]  # catch a closing tag split across chunks
+            parts.append(decoder.decode(b"", final=True))
+            html_text = "".join(parts)
+    except Exception:
         return ""
-    return strip_html(html_text).lower()
+    return article_html_to_text(html_text).lower()
 
-def _full_name_satisfied(article_text: str, full_name: str) -> bool:
-    t = (article_text or "").lower()
+def _full_name_satisfied(t: str, full_name: str) -> bool:
+    """t is already-lowercased article text (as returned by fetch_article_text)."""
     if not t:
         return False
-    if re.search(rf"\b{re.escape(full_name)}\b", t):
+    if contains_word(t, full_name):
         return True
-    if "farage" in full_name and re.search(r"\bmr\s+farage\b", t):
+    if "farage" in full_name and _RE_MR_FARAGE.search(t):
         return True
     if "farage" in full_name:
-        if re.search(r"\bnigel\b.{0,40}\bfarage\b", t) or re.search(r"\bfarage\b.{0,40}\bnigel\b", t):
+        if _RE_NIGEL_FARAGE.search(t):
             return True
     if "yusuf" in full_name:
-        if re.search(r"\bzia\b.{0,40}\byusuf\b", t) or re.search(r"\byusuf\b.{0,40}\bzia\b", t):
+        if _RE_ZIA_YUSUF.search(t):
             return True
     return False
 
-def _body_matches_targets(article_text: str) -> Tuple[bool, Optional[str]]:
-    t = (article_text or "").lower()
+def _body_matches_targets(t: str) -> Tuple[bool, Optional[str]]:
+    """t is already-lowercased article text (as returned by fetch_article_text)."""
     if not t:
         return (False, None)
     # Party phrase
-    if re.search(r"\breform\s*uk\b", t) or re.search(r"\breform\b.{0,12}\bparty\b", t):
+    if _RE_REFORM_PARTY.search(t):
         return (True, "reform uk")
-    # Named people
-    for full in ["nigel farage", "richard tice", "lee anderson", "danny kruger", "sarah pochin", "david bull", "zia yusuf"]:
-        if "farage" in full or "yusuf" in full:
-            if _full_name_satisfied(t, full):
-                return (True, full)
-        elif re.search(rf"\b{re.escape(full)}\b", t):
+    # Named people: one scan for every exact full name, then resolve in priority order
+    found = {m.group(0) for m in _TARGET_ALT.finditer(t)}
+    for full in TARGET_FULL_NAMES:
+        if full in found:
+            return (True, full)
+        if ("farage" in full or "yusuf" in full) and _full_name_satisfied(t, full):
             return (True, full)
     return (False, None)
 
@@ -273,8 +396,11 @@ def extract_google_target(u: str) -> str:
         return u
 
 # ----------- DEDUPE HELPERS -----------
+_FP_KEEP = set((string.ascii_lowercase + string.digits).encode())
+_FP_TABLE = bytes(c if c in _FP_KEEP else 0x20 for c in range(256))  # everything else → space
 _TRACKING_PREFIXES = ("utm_", "gclid", "gclsrc", "fbclid", "at_", "ns_", "ito", "cmp", "icid", "ref")
 
+@lru_cache(maxsize=4096)  # the same URL is canonicalised for the cache key, dedupe and domain
 def canonical_url(url: str) -> str:
     if not url:
         return ""
@@ -284,7 +410,7 @@ def canonical_url(url: str) -> str:
         netloc = s.netloc.lower()
         if netloc.startswith("www."):
             netloc = netloc[4:]
-        path = re.sub(r"/+$", "", s.path) or "/"
+        path = _RE_TRAIL_SLASH.sub("", s.path) or "/"
         keep_keys = {"id", "p", "story", "article"}
         params = [(k, v) for k, v in parse_qsl(s.query, keep_blank_values=True)]
         params = [(k, v) for (k, v) in params if not any(k.lower().startswith(p) for p in _TRACKING_PREFIXES)]
@@ -294,78 +420,134 @@ def canonical_url(url: str) -> str:
     except Exception:
         return url
 
+@lru_cache(maxsize=4096)
 def url_domain(url: str) -> str:
     try:
-        return (urlsplit(url).netloc or "").lower().lstrip("www.")
+        netloc = (urlsplit(url).netloc or "").lower()
+        return netloc[4:] if netloc.startswith("www.") else netloc  # not lstrip: that eats any leading w/.
     except Exception:
         return ""
 
+class Item(NamedTuple):
+    source: str
+    title: str
+    summary: str               # raw feed summary until match_entries strips and clips it
+    link: str
+    published: str
+    dt_sort: float
+    hit: Optional[str]
+    body_check: Optional[str]  # resolved (and cleared) by check_bodies
+    url_key: Optional[int]     # hash of canonical_url(link); None when there is no link
+    domain: str                # outlet domain used for per-outlet title dedupe
+
 def title_fingerprint(title: str) -> str:
-    t = (title or "").lower()
-    t = t.replace("&amp;", "&")
-    t = re.sub(r"[^a-z0-9]+", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+    t = (title or "").lower().replace("&amp;", "&")
+    # Non-ASCII encodes to "?" and, like all other non [a-z0-9] bytes, translates to a space
+    return " ".join(t.encode("ascii", "replace").translate(_FP_TABLE).decode("ascii").split())
 
 # ---------------- MATCHING ----------------
-def find_matching_keywords(title: str, summary: str, url: str) -> Tuple[bool, Optional[str]]:
+BODY_TARGETS = "*"  # body_check value: scan the body for any Reform target (vs. one full name)
+
+def find_matching_keywords(title: str, summary: str) -> Tuple[bool, Optional[str], Optional[str]]:
     """
+    Title/summary stage (no network). Returns (matched, keyword, body_check):
     1) Try KEYWORDS on title+summary (exact/fuzzy).
-    2) If title OR summary contains surname triggers (Farage/Yusuf), fetch and require robust full-name.
-    3) If title+summary contain any BODY_TRIGGERS (incl. Ed Davey / Lib Dem), fetch and scan BODY.
-       - For BBC domains, we are more willing to fetch on triggers due to terse summaries.
+    2) If title OR summary contains surname triggers (Farage/Yusuf), the body must contain the
+       robust full name: body_check is that full name.
+    3) If title+summary contain any BODY_TRIGGERS (incl. Ed Davey / Lib Dem), body_check is
+       BODY_TARGETS and the body is scanned for any target.
+    Body checks are resolved in bulk by check_bodies().
     """
-    global BODY_FETCH_BUDGET
-
+    # Lowercase once; every check below runs on these
     title_l = (title or "").lower()
-    
     summary_l = (summary or "").lower()
     combined = f"{title_l}\n{summary_l}"
-    domain = url_domain(url)
 
-    # 1) Normal keyword matching on title+summary
-    for kw in KEYWORDS:
-        kwl = kw.lower()
-        if re.search(rf"\b{re.escape(kwl)}\b", combined):
-            return True, kw
-        if fuzz.partial_ratio(kwl, combined) >= FUZZY_THRESHOLD:
-            return True, kw
+    # 1) Normal keyword matching on title+summary, in KEYWORDS order. Most entries contain
+    #    none of the keywords, so a plain substring test rules each one out before the
+    #    word-boundary check
+    for kwl in KEYWORDS_LOWER:
+        if kwl in combined and contains_word(combined, kwl):
+            return True, _KW_BY_LOWER[kwl], None
+    # Fuzzy only where a keyword's first 4 chars occur at all (cheap str.find prefilter),
+    # scored in one rapidfuzz call that prunes anything unable to reach the cutoff
+    candidates = [kwl for kwl in KEYWORDS_LOWER if kwl[:4] in combined]
+    if candidates:
+        best = process.extractOne(combined, candidates, scorer=fuzz.partial_ratio, score_cutoff=FUZZY_THRESHOLD)
+        if best:
+            return True, _KW_BY_LOWER[best[0]], None
 
     # 2) Surname → full-name rule (TITLE or SUMMARY)
     for surname, full_name in REQUIRE_FULL_IF_TITLE_OR_SUMMARY_CONTAINS.items():
-        if contains_word(title_l, surname) or contains_word(summary_l, surname):
+        if contains_word(combined, surname):  # a word can't span the "\n" join
             if contains_word(summary_l, full_name):
-                return True, full_name
-            if BODY_FETCH_BUDGET > 0:
-                BODY_FETCH_BUDGET -= 1
-                article_text = fetch_article_text(url)
-                if _full_name_satisfied(article_text, full_name):
-                    return True, full_name
-            return False, None  # have surname in T/S but body didn't satisfy
+                return True, full_name, None
+            return False, None, full_name  # have surname in T/S; body must satisfy
 
     # 3) Body-trigger fallback
-    if any(contains_word(combined, trig) for trig in BODY_TRIGGERS):
-        # BBC boost: their summaries are terse; allow fetch budget priority
-        if BODY_FETCH_BUDGET > 0 or domain.endswith("bbc.co.uk") or domain.endswith("bbc.com"):
-            if BODY_FETCH_BUDGET > 0:
-                BODY_FETCH_BUDGET -= 1
-            article_text = fetch_article_text(url)
-            ok, hit = _body_matches_targets(article_text)
-            if ok:
-                return True, hit
-
-    return False, None
+    if _TRIGGER_ALT.search(combined):
+        return False, None, BODY_TARGETS
+
+    return False, None, None
+
+def _is_bbc(url: str) -> bool:
+    domain = url_domain(url)
+    return domain.endswith("bbc.co.uk") or domain.endswith("bbc.com")
+
+def check_bodies(items: List[Item]) -> List[Item]:
+    """
+    Resolve pending body checks: fetch the needed article bodies in parallel, within
+    BODY_FETCH_BUDGET, and keep items whose body satisfies their check. Order is preserved.
+    """
+    # Spend the budget in feed order, once per distinct URL. BBC summaries are terse, so
+    # their body-trigger scans still go ahead once the budget is spent.
+    budget = BODY_FETCH_BUDGET
+    urls: Dict[str, None] = {}
+    for it in items:
+        check, link = it.body_check, it.link
+        if not check or link in urls:
+            continue
+        if budget > 0:
+            budget -= 1
+            urls[link] = None
+        elif check == BODY_TARGETS and _is_bbc(link):
+            urls[link] = None
+
+    with ThreadPoolExecutor(max_workers=ARTICLE_WORKERS) as pool:
+        texts = dict(zip(urls, pool.map(fetch_article_text, urls)))
+
+    kept = []
+    for it in items:
+        check = it.body_check
+        if check:
+            if it.link not in texts:
+                continue  # over budget
+            text = texts[it.link]
+            if check == BODY_TARGETS:
+                ok, hit = _body_matches_targets(text)
+            else:
+                ok, hit = _full_name_satisfied(text, check), check
+            if not ok:
+                continue
+            it = it._replace(hit=hit, body_check=None)
+        kept.append(it)
+    return kept
 
 # ---------------- PIPELINE ----------------
-def fetch_feed(name, url, start_utc, end_utc):
-    parsed = feedparser.parse(url)
+def collect_feed_entries(name, url, start_ts: float, end_ts: float) -> List[Item]:
+    """Today's entries from one feed, unmatched (hit/body_check unset)."""
+    resp = _SESSION.get(url, timeout=FEED_TIMEOUT)
+    resp.raise_for_status()
+    # Titles/summaries go through strip_html anyway, so skip feedparser's sanitizer and URI pass
+    parsed = feedparser.parse(resp.content, response_headers={"content-type": resp.headers.get("Content-Type", "")},
+                              sanitize_html=False, resolve_relative_uris=False)
     out = []
     for e in parsed.entries[:MAX_ITEMS_PER_FEED]:
         struct = e.get("published_parsed") or e.get("updated_parsed")
         if not struct:
             continue
-        dt_utc = datetime.utcfromtimestamp(calendar.timegm(struct)).replace(tzinfo=tz.UTC)
-        if not (start_utc <= dt_utc < end_utc):
+        ts = calendar.timegm(struct)  # UTC epoch seconds; no datetime per entry
+        if not (start_ts <= ts < end_ts):
             continue
 
         title_raw   = norm(e.get("title"))
@@ -374,50 +556,65 @@ def fetch_feed(name, url, start_utc, end_utc):
         link        = extract_google_target(link_raw)  # handle Google News wrappers
         pub_str     = norm(e.get("published", e.get("updated", "")))
 
-        ok, hit_kw = find_matching_keywords(title_raw, summary_raw, link)
-        if not ok:
-            continue
+        can = canonical_url(link)
+        out.append(Item(
+            source=name,
+            title=strip_html(title_raw),  # stripped here: dedupe fingerprints it
+            summary=summary_raw,
+            link=link,
+            published=pub_str,
+            dt_sort=float(ts),
+            hit=None,
+            body_check=None,
+            url_key=hash(can) if can else None,
+            domain=url_domain(can or link),
+        ))
+    return out
 
-        out.append({
-            "source": name,
-            "title": strip_html(title_raw),
-            "summary": strip_html(summary_raw)[:SUMMARY_CHARS],
-            "link": link,
-            "published": pub_str,
-            "dt_sort": dt_utc.timestamp(),
-            "hit": hit_kw,
-        })
+def match_entries(entries: List[Item]) -> List[Item]:
+    """Title/summary matching for deduped entries; survivors get their summary stripped."""
+    out = []
+    for it in entries:
+        ok, hit_kw, body_check = find_matching_keywords(it.title, it.summary)
+        if not ok and not body_check:
+            continue
+        out.append(it._replace(summary=strip_html(it.summary)[:SUMMARY_CHARS], hit=hit_kw, body_check=body_check))
     return out
 
 def dedupe(items):
-    """Dedupe by canonical URL and title per outlet domain."""
+    """Dedupe by canonical URL and title per outlet domain (keys precomputed at collection).
+    The seen-sets hold 64-bit hashes of the keys, not the strings."""
     seen_urls = set()
-    seen_titles_by_domain = {}
+    seen_titles = set()  # hash((domain, title fingerprint))
     result = []
     for it in items:
-        url = it.get("link", "")
-        can = canonical_url(url)
-        if can:
-            if can in seen_urls:
+        if it.url_key is not None:
+            if it.url_key in seen_urls:
                 continue
-            seen_urls.add(can)
-
-        domain = url_domain(can or url)
-        tfp = title_fingerprint(it.get("title", ""))
+            seen_urls.add(it.url_key)
 
-        bucket = seen_titles_by_domain.setdefault(domain, set())
-        if tfp in bucket:
+        title_key = hash((it.domain, title_fingerprint(it.title)))
+        if title_key in seen_titles:
             continue
-        bucket.add(tfp)
+        seen_titles.add(title_key)
 
         result.append(it)
     return result
 
+# Same output as html.escape(s), in one C-level translate instead of five replace passes
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+def esc(s: str) -> str:
+    return s.translate(_HTML_ESCAPE)
+
+@lru_cache(maxsize=None)
+def _highlight_re(hit_kw: str) -> re.Pattern:
+    return re.compile(re.escape(hit_kw), re.IGNORECASE)
+
 def highlight_title(title: str, hit_kw: Optional[str]) -> str:
-    safe = html.escape(title or "(no title)")
+    safe = esc(title or "(no title)")
     if hit_kw:
-        pattern = re.compile(re.escape(hit_kw), re.IGNORECASE)
-        safe = pattern.sub(r"<b>\g<0></b>", safe)
+        safe = _highlight_re(hit_kw).sub(r"<b>\g<0></b>", safe)
     return safe
 
 def make_pdf(items, path, run_dt_local):
@@ -439,55 +636,46 @@ def make_pdf(items, path, run_dt_local):
     flow.append(Paragraph(sub, h2))
     flow.append(Spacer(1, 8))
 
+    def item_flowables(it, esc=esc):
+        badge = f"[{outlet_name_from_url(it.link)}] " if SHOW_SOURCE_BADGE else ""
+        parts = [Paragraph(highlight_title(badge + (it.title or "(no title)"), it.hit), title_line)]  # bold + badge
+        if it.published:
+            parts.append(Paragraph(f"<i>{esc(it.published)}</i>", body))
+        if it.summary:
+            parts.append(Paragraph(esc(it.summary), body))
+        if it.link:
+            link = esc(it.link)
+            parts.append(Paragraph(f'<a href="{link}">{link}</a>', link_style))
+        parts.append(Spacer(1, 6))
+        return parts
+
     if GROUP_BY_SOURCE:
         # Optional grouped view (kept just in case you toggle it later)
         by_src = {}
         for it in items:
-            by_src.setdefault(it["source"], []).append(it)
+            by_src.setdefault(it.source, []).append(it)
 
         for src in FEED_ORDER:
             flow.append(Paragraph(src, styles["Heading3"]))
-            items_for_src = sorted(by_src.get(src, []), key=lambda x: x.get("dt_sort", 0), reverse=True)
+            items_for_src = sorted(by_src.get(src, []), key=attrgetter("dt_sort"), reverse=True)
             if not items_for_src:
                 flow.append(Paragraph("<i>—</i>", body))
                 flow.append(Spacer(1, 8))
                 continue
 
             for it in items_for_src:
-                badge = f"[{outlet_name_from_url(it.get('link',''))}] " if SHOW_SOURCE_BADGE else ""
-                headline = badge + (it.get("title") or "(no title)")
-                title_markup = highlight_title(headline, it.get("hit"))
-                flow.append(Paragraph(title_markup, title_line))  # bold + badge
-
-                if it.get("published"):
-                    flow.append(Paragraph(f"<i>{html.escape(it['published'])}</i>", body))
-                if it.get("summary"):
-                    flow.append(Paragraph(html.escape(it["summary"]), body))
-                if it.get("link"):
-                    flow.append(Paragraph(f'<a href="{html.escape(it["link"])}">{html.escape(it["link"])}</a>', link_style))
-                flow.append(Spacer(1, 6))
+                flow.extend(item_flowables(it))
             flow.append(Spacer(1, 8))
     else:
         # Default: single combined list
         flow.append(Paragraph("All sources", styles["Heading3"]))
-        items_sorted = sorted(items, key=lambda x: x.get("dt_sort", 0), reverse=True)
+        items_sorted = sorted(items, key=attrgetter("dt_sort"), reverse=True)
 
         if not items_sorted:
             flow.append(Paragraph("<i>No matches today.</i>", body))
 
         for it in items_sorted:
-            badge = f"[{outlet_name_from_url(it.get('link',''))}] " if SHOW_SOURCE_BADGE else ""
-            headline = badge + (it.get("title") or "(no title)")
-            title_markup = highlight_title(headline, it.get("hit"))
-            flow.append(Paragraph(title_markup, title_line))  # bold + badge
-
-            if it.get("published"):
-                flow.append(Paragraph(f"<i>{html.escape(it['published'])}</i>", body))
-            if it.get("summary"):
-                flow.append(Paragraph(html.escape(it["summary"]), body))
-            if it.get("link"):
-                flow.append(Paragraph(f'<a href="{html.escape(it["link"])}">{html.escape(it["link"])}</a>', link_style))
-            flow.append(Spacer(1, 6))
+            flow.extend(item_flowables(it))
 
     def on_page(canvas_, doc_):
         from reportlab.lib.pagesizes import A4 as PAGESIZE
@@ -505,23 +693,33 @@ def main():
     london = tz.gettz(TIMEZONE)
     now_local = datetime.now(tz=london)
 
-    # Today's window in London → UTC
+    # Today's window in London, as UTC epoch bounds
     start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
     end_local   = start_local + timedelta(days=1)
-    start_utc   = start_local.astimezone(tz.UTC)
-    end_utc     = end_local.astimezone(tz.UTC)
-
-    global BODY_FETCH_BUDGET
-    BODY_FETCH_BUDGET = 80
-
-    all_items: List[Dict] = []
-    for name, url in FEEDS.items():
-        try:
-            all_items.extend(fetch_feed(name, url, start_utc, end_utc))
-        except Exception as ex:
-            print(f"[warn] {name}: {ex}")
-
-    all_items = dedupe(all_items)[:MAX_RESULTS_PER_DAY]
+    start_ts    = start_local.timestamp()
+    end_ts      = end_local.timestamp()
+
+    # Feeds are network-bound: fetch them in parallel
+    results: Dict[str, List[Item]] = {}
+    with ThreadPoolExecutor(max_workers=FEED_WORKERS) as pool:
+        futures = {pool.submit(collect_feed_entries, name, url, start_ts, end_ts): name for name, url in FEEDS.items()}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()
+            except Exception as ex:
+                print(f"[warn] {name}: {ex}")
+
+    # Merge in feed order so the body-fetch budget and dedupe behave the same every run
+    all_items: List[Item] = []
+    for name in FEEDS:
+        all_items.extend(results.get(name, []))
+
+    # Dedupe first, so Google News mirrors of the same story are matched (and their bodies
+    # fetched against BODY_FETCH_BUDGET) only once
+    all_items = match_entries(dedupe(all_items))
+    prune_article_cache()
+    all_items = check_bodies(all_items)[:MAX_RESULTS_PER_DAY]
 
     # Where to save
     if USE_DATED_SUBFOLDERS: